@@ -13,6 +13,18 @@ contract FreelanceX {
         Status status;
     }
     
+    struct JobSummary {
+        uint id;
+        address client;
+        address freelancer;
+        uint256 budget;
+        Status status;
+        bytes preview;
+        uint descriptionLength;
+        bytes32 descriptionHash;
+    }
+    
+    uint public constant PREVIEW_LENGTH = 50;
     uint public nextJobId;
     mapping(uint => Job) public jobs;
     
@@ -92,4 +104,34 @@ contract FreelanceX {
     function getJobCount() public view returns (uint) {
         return nextJobId;
     }
+    
+    function getJobSummaries(uint _offset, uint _limit) public view returns (JobSummary[] memory) {
+        if (_offset >= nextJobId) {
+            return new JobSummary[](0);
+        }
+        uint end = _limit > nextJobId - _offset ? nextJobId : _offset + _limit;
+        JobSummary[] memory summaries = new JobSummary[](end - _offset);
+        
+        for (uint i = _offset; i < end; i++) {
+            Job storage job = jobs[i];
+            bytes memory description = bytes(job.description);
+            uint previewLength = description.length < PREVIEW_LENGTH ? description.length : PREVIEW_LENGTH;
+            bytes memory preview = new bytes(previewLength);
+            for (uint j = 0; j < previewLength; j++) {
+                preview[j] = description[j];
+            }
+            
+            summaries[i - _offset] = JobSummary(
+                job.id,
+                job.client,
+                job.freelancer,
+                job.budget,
+                job.status,
+                preview,
+                description.length,
+                keccak256(description)
+            );
+        }
+        return summaries;
+    }
 }
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""Append-only, memory-mapped archive of raw FreelanceX logs
+
+Logs live in numbered segments. Each segment is a pair of files: ``.rec``
+with one fixed-size RECORD per log (in chain order) and ``.dat`` with the
+variable-length log data that records point into. Block numbers are a
+sorted fixed-width column, so a block range is found by binary search
+over the mmap'd records. New logs are appended without rewriting anything.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+from functools import lru_cache
+
+from web3 import Web3
+
+from job_events import EVENT_TOPICS, BlockTimestamps, confirmed_head, iter_log_chunks, sync_range
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+SEGMENT_RECORDS = 1 << 18
+MAX_TOPICS = 4
+
+# block, timestamp, log index, tx index, tx hash, block hash, topic count, topics, data offset, data length
+RECORD = struct.Struct("<QQII32s32sB3x128sQI")
+
+def _to_bytes(value):
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return bytes(value)
+
+@lru_cache(maxsize=4096)
+def _address(word):
+    return Web3.to_checksum_address(word[12:])
+
+def decode_raw(topics, data):
+    """Decode a raw FreelanceX log into (event name, args) without web3's ABI machinery"""
+    name = EVENT_TOPICS.get(topics[0]) if topics else None
+    if name is None:
+        return None
+    job_id = int.from_bytes(topics[1], "big")
+    if name == "JobPosted":
+        offset = int.from_bytes(data[0:32], "big")
+        length = int.from_bytes(data[offset:offset + 32], "big")
+        return name, {
+            "jobId": job_id,
+            "client": _address(topics[2]),
+            "description": data[offset + 32:offset + 32 + length].decode("utf-8", errors="replace"),
+            "budget": int.from_bytes(data[32:64], "big"),
+        }
+    if name == "JobTaken":
+        return name, {"jobId": job_id, "freelancer": _address(topics[2])}
+    return name, {"jobId": job_id}
+
+class EventArchive:
+    """Local append-only log archive that derived views replay from instead of the node"""
+
+    def __init__(self, path, address):
+        self.path = path
+        self.address = address
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._rec_file = None
+        self._dat_file = None
+        self._pending = bytearray()
+        self.head_block = None
+        self._refresh()
+
+    def _segment_path(self, index, ext):
+        return os.path.join(self.path, f"segment-{index:06d}.{ext}")
+
+    def _refresh(self, repair=False):
+        """Reload segment layout and sync progress from disk (another process may have appended)
+
+        Only sync() passes repair=True, while holding the file lock: a trailing
+        partial record may belong to another process that is still writing it.
+        Readers just ignore it.
+        """
+        self._close_files()
+        meta_path = os.path.join(self.path, "meta.json")
+        meta = {"last_block": -1}
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+        self.last_block = meta["last_block"]
+
+        self.segments = sorted(
+            int(name[len("segment-"):-len(".rec")])
+            for name in os.listdir(self.path)
+            if name.startswith("segment-") and name.endswith(".rec")
+        )
+        self.segment_first_blocks = []
+        self.last_record_key = (-1, -1)
+        for index in self.segments:
+            rec_path = self._segment_path(index, "rec")
+            size = os.path.getsize(rec_path)
+            if repair and size % RECORD.size:
+                # Drop a record torn by a crash mid-append
+                with open(rec_path, "r+b") as f:
+                    f.truncate(size - size % RECORD.size)
+                size -= size % RECORD.size
+            with open(rec_path, "rb") as f:
+                first = f.read(RECORD.size)
+                self.segment_first_blocks.append(RECORD.unpack(first)[0] if len(first) == RECORD.size else None)
+                if size >= RECORD.size:
+                    f.seek((size // RECORD.size - 1) * RECORD.size)
+                    last = RECORD.unpack(f.read(RECORD.size))
+                    self.last_record_key = (last[0], last[2])
+        # Records may be ahead of meta.json after a crash; never re-append them
+        self.last_block = max(self.last_block, self.last_record_key[0] - 1 if self.last_record_key[0] >= 0 else -1)
+
+    def _close_files(self):
+        for f in (self._rec_file, self._dat_file):
+            if f:
+                f.close()
+        self._rec_file = self._dat_file = None
+
+    def _open_segment(self):
+        if not self.segments or os.path.getsize(self._segment_path(self.segments[-1], "rec")) >= SEGMENT_RECORDS * RECORD.size:
+            self.segments.append(self.segments[-1] + 1 if self.segments else 0)
+            self.segment_first_blocks.append(None)
+        index = self.segments[-1]
+        self._rec_file = open(self._segment_path(index, "rec"), "ab")
+        self._dat_file = open(self._segment_path(index, "dat"), "ab")
+        self._records = self._rec_file.tell() // RECORD.size
+        self._data_size = self._dat_file.tell()
+
+    def append(self, log, timestamp):
+        """Append one raw log; it becomes visible to readers at the next flush()"""
+        if self._rec_file is None or self._records >= SEGMENT_RECORDS:
+            self.flush()
+            self._close_files()
+            self._open_segment()
+
+        topics = [_to_bytes(topic) for topic in log["topics"]][:MAX_TOPICS]
+        data = _to_bytes(log["data"])
+        self._dat_file.write(data)
+        self._pending += RECORD.pack(
+            log["blockNumber"], timestamp, log["logIndex"], log["transactionIndex"],
+            _to_bytes(log["transactionHash"]), _to_bytes(log["blockHash"]),
+            len(topics), b"".join(topics), self._data_size, len(data),
+        )
+        self._data_size += len(data)
+        self._records += 1
+        if self.segment_first_blocks[-1] is None:
+            self.segment_first_blocks[-1] = log["blockNumber"]
+        self.last_record_key = (log["blockNumber"], log["logIndex"])
+
+    def flush(self):
+        """Make appended logs visible: data reaches disk before the records pointing at it"""
+        if self._rec_file is None:
+            return
+        self._dat_file.flush()
+        self._rec_file.write(self._pending)
+        self._rec_file.flush()
+        self._pending = bytearray()
+
+    def _save_meta(self, last_block):
+        self.last_block = last_block
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"address": self.address, "last_block": last_block}, f)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    def sync(self, w3, from_block=0, max_chunks=None):
+        """Append logs up to the confirmed head, committing after each chunk; returns the number appended
+
+        Only blocks CONFIRMATIONS deep are archived, since appended logs are
+        never rewritten and an orphaned log would be replayed forever.
+        """
+        with self.lock, open(os.path.join(self.path, "lock"), "w") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._refresh(repair=True)
+            latest = confirmed_head(w3)
+            self.head_block = latest
+            start = max(from_block, self.last_block + 1)
+            if start > latest:
+                return 0
+
+            timestamps = BlockTimestamps(w3)
+            appended = 0
+            try:
+                for chunk_end, logs in iter_log_chunks(w3, self.address, start, sync_range(start, latest, max_chunks)):
+                    for log in logs:
+                        if (log["blockNumber"], log["logIndex"]) <= self.last_record_key:
+                            continue
+                        self.append(log, timestamps(log["blockNumber"]))
+                        appended += 1
+                    self.flush()
+                    self._save_meta(chunk_end)
+            finally:
+                self._close_files()
+            return appended
+
+    def _bisect(self, records, count, block_number):
+        """First record index in a mmap'd segment whose block is >= block_number"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if struct.unpack_from("<Q", records, mid * RECORD.size)[0] < block_number:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def records(self, from_block=0, to_block=None):
+        """Yield (block, timestamp, log index, topics, data) for archived logs in a block range"""
+        segments = list(zip(self.segments, self.segment_first_blocks))
+        for position, (index, first_block) in enumerate(segments):
+            if first_block is None or (to_block is not None and first_block > to_block):
+                break
+            next_first = segments[position + 1][1] if position + 1 < len(segments) else None
+            if next_first is not None and next_first < from_block:
+                continue
+
+            with open(self._segment_path(index, "rec"), "rb") as rec_file, \
+                    open(self._segment_path(index, "dat"), "rb") as dat_file:
+                count = os.fstat(rec_file.fileno()).st_size // RECORD.size
+                if not count:
+                    continue
+                records = mmap.mmap(rec_file.fileno(), count * RECORD.size, access=mmap.ACCESS_READ)
+                data_size = os.fstat(dat_file.fileno()).st_size
+                data = mmap.mmap(dat_file.fileno(), data_size, access=mmap.ACCESS_READ) if data_size else b""
+                try:
+                    start = self._bisect(records, count, from_block)
+                    end = count if to_block is None else self._bisect(records, count, to_block + 1)
+                    for (block, timestamp, log_index, _, _, _, topic_count, topics,
+                         data_offset, data_length) in RECORD.iter_unpack(records[start * RECORD.size:end * RECORD.size]):
+                        yield (block, timestamp, log_index,
+                               [topics[i * 32:(i + 1) * 32] for i in range(topic_count)],
+                               data[data_offset:data_offset + data_length])
+                finally:
+                    records.close()
+                    if data_size:
+                        data.close()
+
+    def events(self, from_block=0, to_block=None):
+        """Yield decoded (event name, args, block number, timestamp) in chain order"""
+        for block, timestamp, _, topics, data in self.records(from_block, to_block):
+            decoded = decode_raw(topics, data)
+            if decoded:
+                yield decoded[0], decoded[1], block, timestamp
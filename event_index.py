@@ -0,0 +1,107 @@
+"""Shared sync and persistence for local views folded from FreelanceX events"""
+import json
+import os
+import threading
+
+from job_events import BlockTimestamps, confirmed_head, decode_log, iter_log_chunks, sync_range
+
+class EventIndex:
+    """Base class for views built by applying events in chain order
+
+    Subclasses implement apply_event(name, args, block_number, timestamp) and
+    to_dict()/from_dict(); they get incremental syncing and JSON persistence.
+    Set needs_timestamps = False to skip block timestamp lookups.
+    """
+
+    needs_timestamps = True
+    # Bump when to_dict() changes shape; files in another format are rebuilt from events
+    FORMAT = 1
+
+    def __init__(self):
+        self.last_block = -1
+        # Chain head seen by the last sync; not persisted
+        self.head_block = None
+        self.lock = threading.Lock()
+
+    @property
+    def behind(self):
+        """Whether the last sync stopped short of the chain head"""
+        return self.head_block is not None and self.last_block < self.head_block
+
+    def apply_event(self, name, args, block_number, timestamp):
+        raise NotImplementedError
+
+    def sync(self, w3, contract, from_block=0, archive=None, path=None, max_chunks=None):
+        """Apply events since the last synced block; returns the number applied
+
+        The index is saved to path once per sync, and only if events were
+        applied, since a save rewrites the whole file. A sync that fails part
+        way still saves the chunks it completed. max_chunks bounds the
+        eth_getLogs calls made by one sync; check `behind` to see whether more
+        remain. With an EventArchive the caller syncs the archive first, and
+        events are replayed from it with no node calls.
+        """
+        with self.lock:
+            if archive is not None:
+                self.head_block = archive.head_block
+                applied = 0
+                for name, args, block_number, timestamp in archive.events(max(from_block, self.last_block + 1), archive.last_block):
+                    self.apply_event(name, args, block_number, timestamp)
+                    applied += 1
+                # Without new events only the in-memory position moves; a reload replays from the archive
+                self.last_block = max(self.last_block, archive.last_block)
+                if applied and path:
+                    self.save(path)
+                return applied
+
+            latest = confirmed_head(w3)
+            self.head_block = latest
+            start = max(from_block, self.last_block + 1)
+            if start > latest:
+                return 0
+
+            timestamps = BlockTimestamps(w3) if self.needs_timestamps else None
+            applied = 0
+            try:
+                for chunk_end, logs in iter_log_chunks(w3, contract.address, start, sync_range(start, latest, max_chunks)):
+                    chunk_applied = 0
+                    for log in logs:
+                        decoded = decode_log(contract, log)
+                        if decoded:
+                            block_number = log["blockNumber"]
+                            self.apply_event(decoded[0], decoded[1], block_number,
+                                             timestamps(block_number) if timestamps else None)
+                            chunk_applied += 1
+                    # A chunk only counts once all of its events are applied
+                    self.last_block = chunk_end
+                    applied += chunk_applied
+            finally:
+                if applied and path:
+                    self.save(path)
+            return applied
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Several workers may save the same index; each writes its own temp file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"format": self.FORMAT, **self.to_dict()}, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved index, or start empty if the file is missing, unreadable or in another format
+
+        An empty index is rebuilt from events by the next syncs.
+        """
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("format", 1) != cls.FORMAT:
+            return cls()
+        try:
+            return cls.from_dict(data)
+        except (KeyError, TypeError, ValueError):
+            return cls()
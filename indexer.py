@@ -0,0 +1,65 @@
+"""FreelanceX indexer: the single chain reader publishing shared job state
+
+Run one instance next to any number of Streamlit workers:
+
+    FREELANCEX_RPC_URL=... FREELANCEX_CONTRACT_ADDRESS=... \
+    FREELANCEX_STATE_STORE=redis://localhost:6379/0 python indexer.py
+
+Without FREELANCEX_STATE_STORE it publishes to DEFAULT_STATE_STORE, which
+the app reads by default. On Heroku (DYNO is set) dynos do not share a
+filesystem, so a file store is refused there.
+"""
+import json
+import os
+import time
+
+from web3 import Web3
+
+from rpc_scheduler import ScheduledProvider, get_scheduler
+from shared_state import DEFAULT_STATE_STORE, FileStore, build_state, open_store
+
+def main():
+    rpc_url = os.getenv("FREELANCEX_RPC_URL", "https://rpc.sepolia.org")
+    contract_address = os.getenv("FREELANCEX_CONTRACT_ADDRESS")
+    store_url = os.getenv("FREELANCEX_STATE_STORE", DEFAULT_STATE_STORE)
+    poll_interval = float(os.getenv("FREELANCEX_INDEXER_INTERVAL", "5"))
+
+    if not contract_address:
+        print("❌ FREELANCEX_CONTRACT_ADDRESS is not set")
+        return
+
+    store = open_store(store_url)
+    if isinstance(store, FileStore) and os.getenv("DYNO"):
+        # Web dynos could never read this file; don't spend RPC calls publishing it
+        print(f"❌ {store_url} is a local file, which other dynos cannot read; set FREELANCEX_STATE_STORE to a redis:// URL")
+        return
+
+    provider = Web3.HTTPProvider(rpc_url, request_kwargs={'timeout': 10})
+    rate = float(os.getenv("FREELANCEX_RPC_RATE", "10"))
+    w3 = Web3(ScheduledProvider(provider, get_scheduler(rpc_url, rate=rate)))
+    if not w3.is_connected():
+        print(f"❌ Failed to connect to {rpc_url}")
+        return
+
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "contract_abi.json"), "r") as f:
+        contract = w3.eth.contract(address=contract_address, abi=json.load(f))
+
+    chain_id = w3.eth.chain_id
+    print(f"✅ Indexing {contract_address} on chain {chain_id} via {rpc_url}")
+    print(f"📦 Publishing to {store_url}")
+
+    last_block = None
+    while True:
+        try:
+            block_number = w3.eth.block_number
+            if block_number != last_block:
+                state = build_state(contract, chain_id, block_number)
+                store.publish(state)
+                last_block = block_number
+                print(f"🔄 Block {block_number}: {state['stats']['total']} jobs")
+        except Exception as e:
+            print(f"⚠️ Indexing failed: {e}")
+        time.sleep(poll_interval)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Fetch and decode FreelanceX contract events"""
+import os
+
+from web3 import Web3
+
+EVENT_SIGNATURES = {
+    "JobPosted": "JobPosted(uint256,address,string,uint256)",
+    "JobTaken": "JobTaken(uint256,address)",
+    "JobCompleted": "JobCompleted(uint256)",
+}
+EVENT_TOPICS = {bytes(Web3.keccak(text=sig)): name for name, sig in EVENT_SIGNATURES.items()}
+
+# Public RPCs reject eth_getLogs over large block ranges
+LOG_CHUNK_SIZE = 5000
+# Blocks behind the head before logs are treated as final; stored logs are never revisited
+CONFIRMATIONS = int(os.getenv("FREELANCEX_CONFIRMATIONS", "12"))
+
+def confirmed_head(w3):
+    """Newest block deep enough that its logs will not be reorged away"""
+    return w3.eth.block_number - CONFIRMATIONS
+
+def sync_range(start, latest, max_chunks=None, chunk_size=LOG_CHUNK_SIZE):
+    """Last block to fetch from start, covering at most max_chunks eth_getLogs calls"""
+    if max_chunks is None:
+        return latest
+    return min(latest, start + max_chunks * chunk_size - 1)
+
+def iter_log_chunks(w3, address, from_block, to_block, chunk_size=LOG_CHUNK_SIZE):
+    """Yield (last block of the chunk, its logs oldest first) so callers can persist progress per chunk"""
+    start = from_block
+    while start <= to_block:
+        end = min(start + chunk_size - 1, to_block)
+        logs = w3.eth.get_logs({
+            "address": address,
+            "fromBlock": start,
+            "toBlock": end,
+        })
+        yield end, sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+        start = end + 1
+
+def decode_log(contract, log):
+    """Return (event name, args) for a FreelanceX log, or None for unknown topics"""
+    if not log["topics"]:
+        return None
+    name = EVENT_TOPICS.get(bytes(log["topics"][0]))
+    if name is None:
+        return None
+    event = contract.events[name]().process_log(log)
+    return name, dict(event["args"])
+
+class BlockTimestamps:
+    """Memoized block number -> timestamp lookups"""
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self.cache = {}
+
+    def __call__(self, block_number):
+        if block_number not in self.cache:
+            self.cache[block_number] = self.w3.eth.get_block(block_number)["timestamp"]
+        return self.cache[block_number]
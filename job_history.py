@@ -0,0 +1,198 @@
+"""Point-in-time ("as of block N") job state from periodic snapshots plus event deltas"""
+import bisect
+
+from event_index import EventIndex
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+SNAPSHOT_INTERVAL = 1000  # blocks
+CHECKPOINT_EVERY = 32  # snapshots between full copies of the job state
+
+# Job state tuple layout, matching the contract's status enum
+CLIENT, FREELANCER, BUDGET, STATUS = range(4)
+OPEN, IN_PROGRESS, COMPLETED = range(3)
+STAT_KEYS = ("total", "open", "in_progress", "completed")
+
+def apply_delta(jobs, delta):
+    """Apply one (block, event, job id, address, budget) delta to a job state dict"""
+    _, name, job_id, address, budget = delta
+    if name == "JobPosted":
+        jobs[job_id] = (address, ZERO_ADDRESS, budget, OPEN)
+    elif name == "JobTaken" and job_id in jobs:
+        client, _, budget, _ = jobs[job_id]
+        jobs[job_id] = (client, address, budget, IN_PROGRESS)
+    elif name == "JobCompleted" and job_id in jobs:
+        client, freelancer, budget, _ = jobs[job_id]
+        jobs[job_id] = (client, freelancer, budget, COMPLETED)
+
+def apply_stats_delta(stats, delta, jobs):
+    """Update [total, open, in progress, completed] counts for one delta, given the jobs before it"""
+    _, name, job_id, _, _ = delta
+    previous = jobs.get(job_id)
+    if name == "JobPosted":
+        stats[0] += 1
+        stats[1] += 1
+    elif name == "JobTaken" and previous and previous[STATUS] == OPEN:
+        stats[1] -= 1
+        stats[2] += 1
+    elif name == "JobCompleted" and previous and previous[STATUS] == IN_PROGRESS:
+        stats[2] -= 1
+        stats[3] += 1
+
+class JobHistory(EventIndex):
+    """Job state snapshots every `interval` blocks plus the event deltas between them
+
+    A snapshot labelled S describes the state after every event in blocks <= S,
+    so state_at(N) starts from the newest snapshot S <= N and replays deltas in
+    (S, N]. Snapshots are stored as diffs (the jobs changed since the previous
+    snapshot) plus the status counts at S, so storage grows with the number of
+    job changes rather than jobs x snapshots. Every CHECKPOINT_EVERY-th
+    snapshot is also kept in memory as a full copy (rebuilt on load, never
+    saved), so state_at() merges at most CHECKPOINT_EVERY - 1 diffs.
+
+    Readers take the index lock, since another session may be syncing the
+    same shared instance.
+    """
+
+    needs_timestamps = False
+    FORMAT = 2
+
+    def __init__(self, interval=SNAPSHOT_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self.jobs = {}
+        self.stats = [0, 0, 0, 0]
+        self.snapshot_blocks = []
+        self.snapshot_diffs = []
+        self.snapshot_stats = []
+        # job id -> indices of the snapshots whose diff contains the job
+        self.job_snapshots = {}
+        # Full job state at snapshots 0, CHECKPOINT_EVERY, 2 * CHECKPOINT_EVERY, ...
+        self.checkpoints = []
+        self.changed = set()
+        self.delta_blocks = []
+        self.deltas = []
+
+    def _take_snapshot(self, block_number):
+        index = len(self.snapshot_blocks)
+        self.snapshot_blocks.append(block_number)
+        self.snapshot_diffs.append({job_id: self.jobs[job_id] for job_id in self.changed})
+        self.snapshot_stats.append(tuple(self.stats))
+        for job_id in self.changed:
+            self.job_snapshots.setdefault(job_id, []).append(index)
+        if index % CHECKPOINT_EVERY == 0:
+            self.checkpoints.append(dict(self.jobs))
+        self.changed = set()
+
+    def apply_event(self, name, args, block_number, timestamp=None):
+        """Record one decoded event; events must arrive in chain order"""
+        boundary = (block_number - 1) // self.interval * self.interval
+        if boundary >= 0 and (not self.snapshot_blocks or boundary > self.snapshot_blocks[-1]):
+            # Nothing happened between the previous event and this boundary
+            self._take_snapshot(boundary)
+
+        address = args.get("client") or args.get("freelancer")
+        delta = (block_number, name, args["jobId"], address, args.get("budget"))
+        self.delta_blocks.append(block_number)
+        self.deltas.append(delta)
+        apply_stats_delta(self.stats, delta, self.jobs)
+        apply_delta(self.jobs, delta)
+        if delta[2] in self.jobs:
+            self.changed.add(delta[2])
+
+    def _snapshot_index(self, block_number):
+        return bisect.bisect_right(self.snapshot_blocks, block_number) - 1
+
+    def _deltas_after(self, index, block_number):
+        snapshot_block = self.snapshot_blocks[index] if index >= 0 else -1
+        start = bisect.bisect_right(self.delta_blocks, snapshot_block)
+        end = bisect.bisect_right(self.delta_blocks, block_number)
+        return self.deltas[start:end]
+
+    def state_at(self, block_number):
+        """{job id: (client, freelancer, budget, status)} after all events in blocks <= block_number"""
+        with self.lock:
+            index = self._snapshot_index(block_number)
+            jobs = {}
+            if index >= 0:
+                # Start from the nearest full checkpoint and merge the few diffs after it
+                checkpoint = index // CHECKPOINT_EVERY
+                jobs.update(self.checkpoints[checkpoint])
+                for diff in self.snapshot_diffs[checkpoint * CHECKPOINT_EVERY + 1:index + 1]:
+                    jobs.update(diff)
+            for delta in self._deltas_after(index, block_number):
+                apply_delta(jobs, delta)
+            return jobs
+
+    def job_at(self, job_id, block_number):
+        """(client, freelancer, budget, status) of one job as of a block, or None if not yet posted"""
+        with self.lock:
+            return self._job_at(job_id, block_number)
+
+    def _job_at(self, job_id, block_number):
+        index = self._snapshot_index(block_number)
+        changes = self.job_snapshots.get(job_id, [])
+        position = bisect.bisect_right(changes, index) - 1
+        jobs = {job_id: self.snapshot_diffs[changes[position]][job_id]} if position >= 0 else {}
+        for delta in self._deltas_after(index, block_number):
+            if delta[2] == job_id:
+                apply_delta(jobs, delta)
+        return jobs.get(job_id)
+
+    def stats_at(self, block_number):
+        """Job counts as of a block, in the same layout as job_summaries.count_statuses"""
+        with self.lock:
+            return self._stats_at(block_number)
+
+    def _stats_at(self, block_number):
+        index = self._snapshot_index(block_number)
+        if index < 0:
+            stats, jobs = [0, 0, 0, 0], {}
+            deltas = self._deltas_after(index, block_number)
+        else:
+            stats = list(self.snapshot_stats[index])
+            deltas = self._deltas_after(index, block_number)
+            # Only the jobs touched by the replayed deltas are needed to classify transitions
+            touched = {delta[2] for delta in deltas}
+            jobs = {job_id: self._job_at(job_id, self.snapshot_blocks[index]) for job_id in touched}
+            jobs = {job_id: job for job_id, job in jobs.items() if job is not None}
+        for delta in deltas:
+            apply_stats_delta(stats, delta, jobs)
+            apply_delta(jobs, delta)
+        return dict(zip(STAT_KEYS, stats))
+
+    def to_dict(self):
+        return {
+            "interval": self.interval,
+            "last_block": self.last_block,
+            "jobs": [[job_id, *job] for job_id, job in self.jobs.items()],
+            "stats": self.stats,
+            "changed": sorted(self.changed),
+            "snapshots": [
+                [block, [[job_id, *job] for job_id, job in diff.items()], list(stats)]
+                for block, diff, stats in zip(self.snapshot_blocks, self.snapshot_diffs, self.snapshot_stats)
+            ],
+            "deltas": [list(delta) for delta in self.deltas],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        history = cls(data["interval"])
+        history.last_block = data["last_block"]
+        history.jobs = {job[0]: tuple(job[1:]) for job in data["jobs"]}
+        history.stats = list(data["stats"])
+        history.changed = set(data["changed"])
+        jobs = {}
+        for index, (block, diff, stats) in enumerate(data["snapshots"]):
+            diff = {job[0]: tuple(job[1:]) for job in diff}
+            history.snapshot_blocks.append(block)
+            history.snapshot_diffs.append(diff)
+            history.snapshot_stats.append(tuple(stats))
+            for job_id in diff:
+                history.job_snapshots.setdefault(job_id, []).append(index)
+            jobs.update(diff)
+            if index % CHECKPOINT_EVERY == 0:
+                history.checkpoints.append(dict(jobs))
+        for delta in data["deltas"]:
+            history.delta_blocks.append(delta[0])
+            history.deltas.append(tuple(delta))
+        return history
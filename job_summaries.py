@@ -0,0 +1,53 @@
+"""Description-free job summaries shared by the app and the indexer"""
+from web3 import Web3
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
+
+PREVIEW_LENGTH = 50  # bytes, matches FreelanceX.PREVIEW_LENGTH
+MAX_UINT = 2**256 - 1
+
+# (chain id, address) pairs known to predate getJobSummaries, so they are not probed on every call;
+# the same address may hold a different (or no) contract on another chain
+_summaries_unsupported = set()
+
+def summary_from_job(job):
+    """Reduce a full job tuple to the (description-free) summary layout"""
+    job_id, client, freelancer, description, budget, status = job
+    encoded = description.encode("utf-8")
+    return (job_id, client, freelancer, budget, status,
+            encoded[:PREVIEW_LENGTH].decode("utf-8", errors="ignore"),
+            len(encoded), bytes(Web3.keccak(encoded)))
+
+def fetch_job_summaries(contract, chain_id, offset=0, limit=MAX_UINT, block_identifier="latest"):
+    """Job summaries (id, client, freelancer, budget, status, preview, description length, description hash)
+
+    Deployments predating getJobSummaries fall back to full-job reads, which
+    still download every description; redeploy the contract to avoid that.
+    Network errors (timeouts, rate limits) are raised, not retried as a fallback.
+    """
+    deployment = (chain_id, contract.address)
+    if deployment not in _summaries_unsupported:
+        try:
+            summaries = contract.functions.getJobSummaries(offset, limit).call(block_identifier=block_identifier)
+        except (ContractLogicError, BadFunctionCallOutput):
+            _summaries_unsupported.add(deployment)
+        else:
+            return [
+                (job_id, client, freelancer, budget, status,
+                 preview.decode("utf-8", errors="ignore"), description_length, bytes(description_hash))
+                for job_id, client, freelancer, budget, status, preview, description_length, description_hash in summaries
+            ]
+
+    if limit == 1:
+        return [summary_from_job(contract.functions.getJob(offset).call(block_identifier=block_identifier))]
+    all_jobs = contract.functions.getAllJobs().call(block_identifier=block_identifier)
+    return [summary_from_job(job) for job in all_jobs[offset:offset + limit]]
+
+def count_statuses(summaries):
+    """Job counts as {"total", "open", "in_progress", "completed"}"""
+    stats = {"total": len(summaries), "open": 0, "in_progress": 0, "completed": 0}
+    for summary in summaries:
+        status = summary[4]  # status is the 5th element
+        if status == 0: stats["open"] += 1
+        elif status == 1: stats["in_progress"] += 1
+        elif status == 2: stats["completed"] += 1
+    return stats
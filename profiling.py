@@ -0,0 +1,172 @@
+"""Opt-in per-rerun profiling: phase timings, cProfile top-N and flame graphs
+
+Nothing here runs unless a RerunProfiler is started; phase() is then a shared
+no-op context manager.
+"""
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+SAMPLE_INTERVAL = 0.005  # seconds
+MAX_SAMPLE_SECONDS = 120
+TOP_N = 25
+MAX_PROFILE_RUNS = int(os.getenv("FREELANCEX_PROFILE_KEEP", "20"))
+
+_local = threading.local()
+_NULL_PHASE = contextlib.nullcontext()
+
+def phase(name):
+    """Attribute the enclosed block to an app phase while this thread is being profiled"""
+    profiler = getattr(_local, "profiler", None)
+    if profiler is None:
+        return _NULL_PHASE
+    return profiler.phase(name)
+
+def _package(filename):
+    """Top-level package (or "app") owning a source file, for self-time rollups"""
+    if filename.startswith("~") or filename.startswith("<"):
+        return "builtins"
+    for marker in ("site-packages", "dist-packages"):
+        if marker in filename:
+            return filename.split(marker, 1)[1].lstrip("/\\").split("/")[0].split("\\")[0]
+    if filename.startswith(os.path.dirname(os.path.abspath(__file__))):
+        return "app"
+    return "stdlib"
+
+def prune_profiles(output_dir, keep=MAX_PROFILE_RUNS):
+    """Delete all but the newest `keep` reruns' profile files (FREELANCEX_PROFILE=1 writes one per rerun)"""
+    runs = sorted({name.split(".", 1)[0] for name in os.listdir(output_dir) if name.startswith("rerun-")})
+    for stem in runs[:-keep] if keep > 0 else runs:
+        for suffix in (".speedscope.json", ".folded.txt"):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(output_dir, stem + suffix))
+
+def _frame_label(code):
+    return (code.co_name, code.co_filename, code.co_firstlineno)
+
+class RerunProfiler:
+    """Profile one script run with cProfile plus a wall-clock stack sampler"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.phases = []
+        self.samples = Counter()
+        self.stopped = threading.Event()
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.started_wall = time.perf_counter()
+        self.started_cpu = time.thread_time()
+        self.sampler = threading.Thread(target=self._sample, name="rerun-profiler", daemon=True)
+        self.sampler.start()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        _local.profiler = self
+        return self
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - wall, time.thread_time() - cpu))
+
+    def _sample(self):
+        deadline = time.monotonic() + MAX_SAMPLE_SECONDS
+        while not self.stopped.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def stop(self, output_dir=None):
+        """Stop profiling and return a summary dict; flame graphs are written to output_dir"""
+        self.profile.disable()
+        wall = time.perf_counter() - self.started_wall
+        cpu = time.thread_time() - self.started_cpu
+        self.stopped.set()
+        self.sampler.join()
+        _local.profiler = None
+
+        stats = pstats.Stats(self.profile)
+        rows = []
+        packages = defaultdict(float)
+        rpc_wait = 0.0
+        for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            rows.append((f"{name} ({os.path.basename(filename)}:{line})", ncalls, tottime, cumtime))
+            packages[_package(filename)] += tottime
+            if name == "make_request":
+                # Provider wrappers nest, so the outermost make_request covers all RPC time
+                rpc_wait = max(rpc_wait, cumtime)
+        rows.sort(key=lambda row: row[3], reverse=True)
+
+        summary = {
+            "wall": wall,
+            "cpu": cpu,
+            "rpc_wait": rpc_wait,
+            "phases": self.phases,
+            "packages": sorted(packages.items(), key=lambda item: item[1], reverse=True),
+            "top": rows[:TOP_N],
+            "files": {},
+        }
+        if output_dir and self.samples:
+            os.makedirs(output_dir, exist_ok=True)
+            stamp = time.strftime("rerun-%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+            stem = os.path.join(output_dir, stamp)
+            summary["files"]["speedscope"] = self.write_speedscope(f"{stem}.speedscope.json", wall)
+            summary["files"]["folded"] = self.write_folded(f"{stem}.folded.txt")
+            prune_profiles(output_dir)
+        return summary
+
+    def write_folded(self, path):
+        """Brendan Gregg collapsed stacks, for flamegraph.pl / inferno"""
+        with open(path, "w") as f:
+            for stack, count in self.samples.items():
+                f.write(";".join(f"{name} ({os.path.basename(filename)}:{line})" for name, filename, line in stack))
+                f.write(f" {count}\n")
+        return path
+
+    def write_speedscope(self, path, wall):
+        """Sampled profile in the speedscope file format (https://www.speedscope.app)"""
+        frames = []
+        frame_index = {}
+        samples = []
+        weights = []
+        weight = wall / max(1, sum(self.samples.values()))
+        for stack, count in self.samples.items():
+            indices = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label[0], "file": label[1], "line": label[2]})
+                indices.append(frame_index[label])
+            samples.append(indices)
+            weights.append(count * weight)
+
+        with open(path, "w") as f:
+            json.dump({
+                "$schema": "https://www.speedscope.app/file-format-schema.json",
+                "shared": {"frames": frames},
+                "profiles": [{
+                    "type": "sampled",
+                    "name": "FreelanceX rerun",
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }],
+                "name": "FreelanceX rerun",
+                "exporter": "freelancex-profiling",
+            }, f)
+        return path
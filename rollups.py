@@ -0,0 +1,202 @@
+"""Time-bucketed marketplace rollups built incrementally from FreelanceX events"""
+import math
+
+from event_index import EventIndex
+
+HOUR = 3600
+DAY = 86400
+RESOLUTIONS = {"hourly": HOUR, "daily": DAY}
+
+# jobs_posted values are budgets (wei), jobs_taken values are time-to-take (seconds),
+# jobs_completed values are released budgets (wei)
+METRICS = ("jobs_posted", "jobs_taken", "jobs_completed")
+
+class QuantileSketch:
+    """Log-bucketed histogram answering percentiles within a fixed relative error"""
+
+    def __init__(self, relative_accuracy=0.01, bins=None, zero_count=0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = dict(bins or {})
+        self.zero_count = zero_count
+        self.count = zero_count + sum(self.bins.values())
+
+    def add(self, value):
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self.log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+        self.count += 1
+
+    def quantile(self, q):
+        """Approximate value at quantile q (0-1), or None if empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": {str(k): v for k, v in self.bins.items()},
+            "zero_count": self.zero_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["relative_accuracy"],
+            {int(k): v for k, v in data["bins"].items()},
+            data["zero_count"],
+        )
+
+class Bucket:
+    """count/sum/min/max plus a percentile sketch for one metric in one time bucket"""
+
+    def __init__(self, count=0, total=0, minimum=None, maximum=None, sketch=None):
+        self.count = count
+        self.total = total
+        self.minimum = minimum
+        self.maximum = maximum
+        self.sketch = sketch or QuantileSketch()
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.sketch.add(value)
+
+    def stat(self, name):
+        if name == "count":
+            return self.count
+        if name == "sum":
+            return self.total
+        if name == "min":
+            return self.minimum
+        if name == "max":
+            return self.maximum
+        if name == "mean":
+            return self.total / self.count if self.count else None
+        if name.startswith("p"):
+            return self.sketch.quantile(int(name[1:]) / 100)
+        raise ValueError(f"Unknown bucket stat: {name}")
+
+    def to_dict(self):
+        # Sums are kept as strings: wei totals overflow JSON-safe integers in some readers
+        return {
+            "count": self.count,
+            "sum": str(self.total),
+            "min": None if self.minimum is None else str(self.minimum),
+            "max": None if self.maximum is None else str(self.maximum),
+            "sketch": self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["count"],
+            int(data["sum"]),
+            None if data["min"] is None else int(data["min"]),
+            None if data["max"] is None else int(data["max"]),
+            QuantileSketch.from_dict(data["sketch"]),
+        )
+
+class MarketplaceRollups(EventIndex):
+    """Materialized hourly and daily buckets, updated one event at a time"""
+
+    def __init__(self):
+        super().__init__()
+        self.buckets = {res: {metric: {} for metric in METRICS} for res in RESOLUTIONS}
+        # Open jobs only need posting time and budget to derive time-to-take and releases
+        self.jobs = {}
+        # Newest bucket start per resolution, so series() never scans bucket keys
+        self.latest = {res: None for res in RESOLUTIONS}
+
+    def record(self, metric, timestamp, value):
+        for resolution, width in RESOLUTIONS.items():
+            start = timestamp - timestamp % width
+            if self.latest[resolution] is None or start > self.latest[resolution]:
+                self.latest[resolution] = start
+            buckets = self.buckets[resolution][metric]
+            if start not in buckets:
+                buckets[start] = Bucket()
+            buckets[start].add(value)
+
+    def apply_event(self, name, args, block_number, timestamp):
+        """Fold one decoded JobPosted/JobTaken/JobCompleted event into the buckets"""
+        job_id = args["jobId"]
+        if name == "JobPosted":
+            self.jobs[job_id] = {"posted_at": timestamp, "budget": args["budget"]}
+            self.record("jobs_posted", timestamp, args["budget"])
+        elif name == "JobTaken":
+            job = self.jobs.get(job_id)
+            if job:
+                self.record("jobs_taken", timestamp, max(0, timestamp - job["posted_at"]))
+        elif name == "JobCompleted":
+            job = self.jobs.pop(job_id, None)
+            if job:
+                self.record("jobs_completed", timestamp, job["budget"])
+
+    def series(self, metric, resolution="hourly", stat="count", limit=48, end=None):
+        """Last `limit` buckets of one stat as (bucket start, value) pairs
+
+        Only `limit` bucket lookups are made, independent of history length.
+        Holds the index lock, since another session may be syncing this
+        shared instance and adding to the same buckets.
+        """
+        with self.lock:
+            return self._series(metric, resolution, stat, limit, end)
+
+    def _series(self, metric, resolution, stat, limit, end):
+        width = RESOLUTIONS[resolution]
+        buckets = self.buckets[resolution][metric]
+        if end is None:
+            end = self.latest[resolution]
+            if end is None:
+                return []
+        end -= end % width
+        series = []
+        for start in range(end - (limit - 1) * width, end + width, width):
+            bucket = buckets.get(start)
+            if bucket is None:
+                series.append((start, 0 if stat in ("count", "sum") else None))
+            else:
+                series.append((start, bucket.stat(stat)))
+        return series
+
+    def to_dict(self):
+        return {
+            "last_block": self.last_block,
+            "latest": self.latest,
+            "jobs": {str(k): v for k, v in self.jobs.items()},
+            "buckets": {
+                res: {
+                    metric: {str(start): b.to_dict() for start, b in buckets.items()}
+                    for metric, buckets in metrics.items()
+                }
+                for res, metrics in self.buckets.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        rollups = cls()
+        rollups.last_block = data["last_block"]
+        rollups.jobs = {int(k): v for k, v in data["jobs"].items()}
+        for res, metrics in data["buckets"].items():
+            for metric, buckets in metrics.items():
+                rollups.buckets[res][metric] = {
+                    int(start): Bucket.from_dict(b) for start, b in buckets.items()
+                }
+        rollups.latest.update(data["latest"])
+        return rollups
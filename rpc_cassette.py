@@ -0,0 +1,163 @@
+"""Record/replay JSON-RPC provider for deterministic offline runs"""
+import atexit
+import gzip
+import json
+import random
+import threading
+import time
+
+from web3.providers import JSONBaseProvider
+
+# (mean ms, jitter ms) added to every replayed response
+LATENCY_PROFILES = {
+    "none": (0, 0),
+    "local": (5, 2),
+    "public-rpc": (250, 120),
+    "congested": (800, 500),
+}
+# Recorded lines are flushed to disk every this many calls, and on close()
+FLUSH_EVERY = 100
+
+class CassetteMiss(Exception):
+    """Raised in replay mode for a request that was never recorded"""
+
+def request_key(method, params):
+    """Canonical cassette key for a JSON-RPC call"""
+    return f"{method}:{json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)}"
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+def load_cassette(path):
+    """Load a cassette as {key: [(response, elapsed ms), ...]}, cached per path"""
+    with _cassettes_lock:
+        if path not in _cassettes:
+            entries = {}
+            with _open(path, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    entries.setdefault(record["k"], []).append((record["r"], record["t"]))
+            _cassettes[path] = entries
+        return _cassettes[path]
+
+class CassetteRecorder:
+    """One append handle on a cassette (a single gzip member for .gz), shared by every provider recording to it"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = _open(path, "a")
+        self.unflushed = 0
+
+    def write(self, line):
+        with self.lock:
+            if self.file is None:
+                raise ValueError(f"Cassette {self.path} is closed")
+            self.file.write(line + "\n")
+            self.unflushed += 1
+            if self.unflushed >= FLUSH_EVERY:
+                self.file.flush()
+                self.unflushed = 0
+
+    def close(self):
+        """Flush and close the recording; safe to call more than once"""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+_recorders = {}
+_recorders_lock = threading.Lock()
+
+def get_recorder(path):
+    """Process-wide recorder for a cassette path, shared by every session and rerun"""
+    with _recorders_lock:
+        recorder = _recorders.get(path)
+        if recorder is None or recorder.file is None:
+            recorder = _recorders[path] = CassetteRecorder(path)
+            # Streamlit never tears providers down, so finish the gzip stream at exit
+            atexit.register(recorder.close)
+        return recorder
+
+class CassetteProvider(JSONBaseProvider):
+    """Wrap a provider to record its traffic, or replay a recording without one
+
+    Record mode appends one compact JSON line per call through the path's
+    shared CassetteRecorder, so providers rebuilt on every rerun never open a
+    second writer on the same file. Replay mode serves recorded responses in
+    order per request (repeating the last one once exhausted) and sleeps
+    according to the latency profile: a name from LATENCY_PROFILES,
+    "recorded" to reuse the original timings, or None.
+    """
+
+    def __init__(self, path, mode="replay", provider=None, latency=None, seed=0):
+        super().__init__()
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == "record" and provider is None:
+            raise ValueError("Record mode needs a provider to wrap")
+        if latency not in (None, "recorded") and latency not in LATENCY_PROFILES:
+            raise ValueError(f"Unknown latency profile: {latency}")
+
+        self.path = path
+        self.mode = mode
+        self.provider = provider
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.cursors = {}
+        self.lock = threading.Lock()
+        self.entries = load_cassette(path) if mode == "replay" else None
+        self.recorder = get_recorder(path) if mode == "record" else None
+
+    def __str__(self):
+        return f"CassetteProvider<{self.mode}:{self.path}>"
+
+    def make_request(self, method, params):
+        key = request_key(method, params)
+        if self.mode == "record":
+            return self._record(key, method, params)
+        return self._replay(key)
+
+    def _record(self, key, method, params):
+        started = time.perf_counter()
+        response = self.provider.make_request(method, params)
+        elapsed = round((time.perf_counter() - started) * 1000, 1)
+
+        line = json.dumps({"k": key, "r": response, "t": elapsed}, separators=(',', ':'), default=str)
+        self.recorder.write(line)
+        return response
+
+    def _replay(self, key):
+        responses = self.entries.get(key)
+        if not responses:
+            raise CassetteMiss(f"No recorded response for {key}")
+
+        with self.lock:
+            index = self.cursors.get(key, 0)
+            self.cursors[key] = index + 1
+            response, recorded_ms = responses[min(index, len(responses) - 1)]
+            delay_ms = self._delay(recorded_ms)
+
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+        return response
+
+    def _delay(self, recorded_ms):
+        if self.latency is None:
+            return 0
+        if self.latency == "recorded":
+            return recorded_ms
+        mean, jitter = LATENCY_PROFILES[self.latency]
+        return max(0, self.random.gauss(mean, jitter))
+
+    def is_connected(self, show_traceback=False):
+        if self.mode == "record":
+            return self.provider.is_connected()
+        return bool(self.entries)
@@ -0,0 +1,206 @@
+"""Request coalescing and rate-limit-aware scheduling in front of a Web3 provider"""
+import copy
+import heapq
+import itertools
+import threading
+import time
+
+from web3.exceptions import ProviderConnectionError
+from web3.providers import JSONBaseProvider
+
+from rpc_cassette import request_key
+
+WRITE_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+# Stateful calls whose identical concurrent requests must not share a response
+UNCOALESCED_METHODS = WRITE_METHODS | {
+    "eth_newFilter",
+    "eth_newBlockFilter",
+    "eth_getFilterChanges",
+    "eth_uninstallFilter",
+}
+# JSON-RPC error codes public endpoints use for "slow down"
+RATE_LIMIT_CODES = {429, -32005}
+
+WRITE_PRIORITY = 0
+READ_PRIORITY = 1
+
+class _Call:
+    """One in-flight request that identical concurrent requests wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+def _rate_limit_delay(error):
+    """(is rate limited, Retry-After seconds or None) for a provider exception"""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) != 429:
+        return False, None
+    try:
+        return True, float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return True, None
+
+class RpcScheduler:
+    """Per-endpoint token bucket with single-flight reads, write priority and AIMD backoff
+
+    Tokens refill at `rate` requests/second up to `burst`. Queued writes are
+    always served before queued reads. A 429 halves the rate and blocks the
+    endpoint for an exponentially growing backoff (or Retry-After); each
+    success recovers 5% of the configured rate.
+    """
+
+    def __init__(self, rate=10.0, burst=20, max_retries=4, base_backoff=0.5, max_backoff=30.0, min_rate=0.5):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.cond = threading.Condition()
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.backoff = 0.0
+        self.waiters = []
+        self.sequence = itertools.count()
+
+        self.inflight_lock = threading.Lock()
+        self.inflight = {}
+        self.stats = {"requests": 0, "coalesced": 0, "throttled": 0}
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=READ_PRIORITY):
+        """Block until a token is available and no higher-priority request is waiting"""
+        with self.cond:
+            ticket = (priority, next(self.sequence))
+            heapq.heappush(self.waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self.waiters[0] != ticket:
+                        self.cond.wait()
+                        continue
+                    if now >= self.blocked_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        self.stats["requests"] += 1
+                        return
+                    self.cond.wait(max(self.blocked_until - now, (1 - self.tokens) / self.rate))
+            finally:
+                self.waiters.remove(ticket)
+                heapq.heapify(self.waiters)
+                self.cond.notify_all()
+
+    def throttled(self, retry_after=None):
+        """Back off after the endpoint signalled a rate limit"""
+        with self.cond:
+            self.stats["throttled"] += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.backoff = min(self.max_backoff, self.backoff * 2 if self.backoff else self.base_backoff)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + (retry_after or self.backoff))
+            self.tokens = 0
+            self.cond.notify_all()
+
+    def succeeded(self):
+        with self.cond:
+            self.backoff = 0.0
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def _send(self, provider, method, params, priority):
+        for attempt in range(self.max_retries + 1):
+            self.acquire(priority)
+            try:
+                response = provider.make_request(method, params)
+            except Exception as e:
+                limited, retry_after = _rate_limit_delay(e)
+                if not limited or attempt == self.max_retries:
+                    raise
+                self.throttled(retry_after)
+                continue
+
+            error = response.get("error") if isinstance(response, dict) else None
+            if isinstance(error, dict) and error.get("code") in RATE_LIMIT_CODES and attempt < self.max_retries:
+                self.throttled()
+                continue
+
+            self.succeeded()
+            return response
+
+    def request(self, provider, method, params):
+        """Send a request through the scheduler, sharing identical in-flight reads"""
+        if method in UNCOALESCED_METHODS:
+            priority = WRITE_PRIORITY if method in WRITE_METHODS else READ_PRIORITY
+            return self._send(provider, method, params, priority)
+
+        key = request_key(method, params)
+        with self.inflight_lock:
+            call = self.inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self.inflight[key] = _Call()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.response)
+
+        try:
+            response = self._send(provider, method, params, READ_PRIORITY)
+            call.response = copy.deepcopy(response)
+            return response
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.inflight_lock:
+                del self.inflight[key]
+            call.done.set()
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(endpoint, **kwargs):
+    """Process-wide scheduler for an endpoint, shared by every session and rerun"""
+    with _schedulers_lock:
+        if endpoint not in _schedulers:
+            _schedulers[endpoint] = RpcScheduler(**kwargs)
+        return _schedulers[endpoint]
+
+class ScheduledProvider(JSONBaseProvider):
+    """Provider wrapper routing every request through an RpcScheduler"""
+
+    def __init__(self, provider, scheduler):
+        super().__init__()
+        self.provider = provider
+        self.scheduler = scheduler
+
+    def __str__(self):
+        return f"ScheduledProvider<{self.provider}>"
+
+    def make_request(self, method, params):
+        return self.scheduler.request(self.provider, method, params)
+
+    def is_connected(self, show_traceback=False):
+        # Probe through the scheduler so health checks share the rate limit and backoff
+        try:
+            response = self.make_request("web3_clientVersion", [])
+        except Exception as e:
+            if show_traceback:
+                raise ProviderConnectionError(f"Problem connecting to provider with error: {type(e)}: {e}") from e
+            return False
+        if "error" in response:
+            if show_traceback:
+                raise ProviderConnectionError(f"Error received from provider: {response}")
+            return False
+        return True
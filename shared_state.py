@@ -0,0 +1,111 @@
+"""Single-writer, many-reader job state shared across app workers
+
+The indexer (indexer.py) is the only process talking to the chain for job
+lists and stats; it publishes a snapshot to a store that every Streamlit
+worker reads. Stores are selected by URL:
+
+- ``file:///path/state.json`` or a plain path: local file, atomically replaced
+- ``redis://host:6379/0``: Redis (needs the optional ``redis`` package)
+"""
+import json
+import os
+import threading
+import time
+
+from job_summaries import count_statuses, fetch_job_summaries
+
+STATE_VERSION = 2
+# Used by both the indexer and the app when FREELANCEX_STATE_STORE is not set
+DEFAULT_STATE_STORE = os.path.join(os.getenv("FREELANCEX_DATA_DIR", ".freelancex"), "state.json")
+
+class FileStore:
+    """Job state in a local file; readers only re-parse it after it changes"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._state = None
+        self._mtime = None
+
+    def publish(self, state):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, separators=(',', ':'))
+        # Readers see either the old or the new snapshot, never a partial one
+        os.replace(tmp_path, self.path)
+
+    def read(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            if mtime != self._mtime:
+                with open(self.path, "r") as f:
+                    self._state = json.load(f)
+                self._mtime = mtime
+            return self._state
+
+class RedisStore:
+    """Job state in Redis; readers poll a version counter before fetching the payload"""
+
+    def __init__(self, url, key="freelancex:state"):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("RedisStore needs the redis package: pip install redis")
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+        self.version_key = f"{key}:version"
+        self.lock = threading.Lock()
+        self._state = None
+        self._version = None
+
+    def publish(self, state):
+        pipe = self.client.pipeline()
+        pipe.set(self.key, json.dumps(state, separators=(',', ':')))
+        pipe.incr(self.version_key)
+        pipe.execute()
+
+    def read(self):
+        version = self.client.get(self.version_key)
+        if version is None:
+            return None
+        with self.lock:
+            if version != self._version:
+                payload = self.client.get(self.key)
+                self._state = json.loads(payload) if payload else None
+                self._version = version
+            return self._state
+
+def open_store(url):
+    """Open the job state store named by url"""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(url)
+    if url.startswith("file://"):
+        url = url[len("file://"):]
+    return FileStore(url)
+
+def build_state(contract, chain_id, block_number):
+    """Snapshot of all job summaries and stats at one block"""
+    summaries = fetch_job_summaries(contract, chain_id, block_identifier=block_number)
+    return {
+        "version": STATE_VERSION,
+        "chain_id": chain_id,
+        "address": contract.address,
+        "block": block_number,
+        "published_at": time.time(),
+        "stats": count_statuses(summaries),
+        "jobs": [list(summary[:7]) + [summary[7].hex()] for summary in summaries],
+    }
+
+def state_matches(state, chain_id, address):
+    """Whether a snapshot was published for this chain and contract"""
+    return (state.get("version") == STATE_VERSION
+            and state.get("chain_id") == chain_id
+            and str(state.get("address", "")).lower() == address.lower())
+
+def summaries_from_state(state):
+    """Job summary tuples from a published snapshot"""
+    return [tuple(job[:7]) + (bytes.fromhex(job[7]),) for job in state["jobs"]]
@@ -1,8 +1,21 @@
 import streamlit as st
+import pandas as pd
 import json
 import os
+import time
+from datetime import datetime, timezone
 from web3 import Web3
 from eth_account import Account
+from web3.exceptions import TransactionNotFound
+
+from rollups import MarketplaceRollups
+from job_history import JobHistory
+from event_archive import EventArchive
+from profiling import RerunProfiler, phase
+from rpc_cassette import CassetteProvider
+from rpc_scheduler import ScheduledProvider, get_scheduler
+from job_summaries import count_statuses, fetch_job_summaries
+from shared_state import DEFAULT_STATE_STORE, open_store, state_matches, summaries_from_state
 
 # Streamlit Cloud Configuration
 st.set_page_config(page_title="FreelanceX", layout="wide")
@@ -26,13 +39,38 @@ def get_web3_connection():
     selected_network = st.sidebar.selectbox("🌐 Select Network", list(networks.keys()))
     rpc_urls = networks[selected_network]
 
+    # Optional RPC cassette for reproducible offline benchmarking
+    cassette_path = os.getenv("FREELANCEX_RPC_CASSETTE")
+    cassette_mode = os.getenv("FREELANCEX_RPC_CASSETTE_MODE", "replay")
+    if cassette_path and cassette_mode == "replay":
+        try:
+            w3 = Web3(CassetteProvider(cassette_path, latency=os.getenv("FREELANCEX_RPC_LATENCY")))
+            st.sidebar.success(f"📼 Replaying {cassette_path}")
+            return w3, selected_network
+        except Exception as e:
+            st.sidebar.error(f"❌ Cassette replay failed: {e}")
+            return None, None
+
     # Try multiple RPC endpoints
     for i, rpc_url in enumerate(rpc_urls):
         try:
-            w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={'timeout': 10}))
+            provider = Web3.HTTPProvider(rpc_url, request_kwargs={'timeout': 10})
+            if cassette_path and cassette_mode == "record":
+                provider = CassetteProvider(cassette_path, mode="record", provider=provider)
+            # Coalesce identical concurrent reads and respect endpoint rate limits across all sessions
+            scheduler = None
+            if os.getenv("FREELANCEX_RPC_SCHEDULER", "1") != "0":
+                scheduler = get_scheduler(rpc_url, rate=float(os.getenv("FREELANCEX_RPC_RATE", "10")))
+                provider = ScheduledProvider(provider, scheduler)
+            w3 = Web3(provider)
             if w3.is_connected():
                 st.sidebar.success(f"✅ Connected to {selected_network}")
                 st.sidebar.write(f"**RPC:** {rpc_url}")
+                if scheduler:
+                    st.sidebar.caption(
+                        f"⏱️ {scheduler.rate:.1f} req/s · {scheduler.stats['requests']} sent · "
+                        f"{scheduler.stats['coalesced']} coalesced · {scheduler.stats['throttled']} throttled"
+                    )
                 return w3, selected_network
             else:
                 if i < len(rpc_urls) - 1:
@@ -114,6 +152,19 @@ def load_contract_abi():
             "name": "JobTaken",
             "type": "event"
         },
+        {
+            "inputs": [],
+            "name": "PREVIEW_LENGTH",
+            "outputs": [
+                {
+                    "internalType": "uint256",
+                    "name": "",
+                    "type": "uint256"
+                }
+            ],
+            "stateMutability": "view",
+            "type": "function"
+        },
         {
             "inputs": [
                 {
@@ -229,6 +280,72 @@ def load_contract_abi():
             "stateMutability": "view",
             "type": "function"
         },
+        {
+            "inputs": [
+                {
+                    "internalType": "uint256",
+                    "name": "_offset",
+                    "type": "uint256"
+                },
+                {
+                    "internalType": "uint256",
+                    "name": "_limit",
+                    "type": "uint256"
+                }
+            ],
+            "name": "getJobSummaries",
+            "outputs": [
+                {
+                    "components": [
+                        {
+                            "internalType": "uint256",
+                            "name": "id",
+                            "type": "uint256"
+                        },
+                        {
+                            "internalType": "address",
+                            "name": "client",
+                            "type": "address"
+                        },
+                        {
+                            "internalType": "address",
+                            "name": "freelancer",
+                            "type": "address"
+                        },
+                        {
+                            "internalType": "uint256",
+                            "name": "budget",
+                            "type": "uint256"
+                        },
+                        {
+                            "internalType": "enum FreelanceX.Status",
+                            "name": "status",
+                            "type": "uint8"
+                        },
+                        {
+                            "internalType": "bytes",
+                            "name": "preview",
+                            "type": "bytes"
+                        },
+                        {
+                            "internalType": "uint256",
+                            "name": "descriptionLength",
+                            "type": "uint256"
+                        },
+                        {
+                            "internalType": "bytes32",
+                            "name": "descriptionHash",
+                            "type": "bytes32"
+                        }
+                    ],
+                    "internalType": "struct FreelanceX.JobSummary[]",
+                    "name": "",
+                    "type": "tuple[]"
+                }
+            ],
+            "stateMutability": "view",
+            "type": "function"
+        },
         {
             "inputs": [
                 {
@@ -340,187 +457,514 @@ def get_account_from_private_key():
     except:
         return None
 
-# Main App
-st.title("🧑‍💻 FreelanceX - Decentralized Freelancing Platform")
+STATUS_MAP = {0: "🟢 Open", 1: "🟡 In Progress", 2: "✅ Completed"}
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+JOBS_PER_PAGE = 10
+DESCRIPTION_CACHE_SIZE = 256
+DATA_DIR = os.getenv("FREELANCEX_DATA_DIR", ".freelancex")
+DEPLOY_BLOCK = int(os.getenv("FREELANCEX_DEPLOY_BLOCK", "0"))
+INDEX_SYNC_INTERVAL = 30  # seconds between local event index syncs
+SYNC_CHUNKS_PER_RERUN = 3  # eth_getLogs calls one rerun may spend catching up
+USE_EVENT_ARCHIVE = os.getenv("FREELANCEX_EVENT_ARCHIVE", "1") != "0"
+STATE_STORE_URL = os.getenv("FREELANCEX_STATE_STORE", DEFAULT_STATE_STORE)
+STATE_MAX_AGE = 120  # seconds before falling back to direct RPC reads
+
+# st.fragment is stable from Streamlit 1.37; older releases only ship the experimental name
+_st_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+def as_fragment(func):
+    """Run func as an independently re-executing fragment in fragment rendering mode"""
+    if fragment_mode and _st_fragment is not None:
+        return _st_fragment(func)
+    return func
+
+def rerun_fragment():
+    """Rerun only the calling fragment, or the whole script outside fragment mode"""
+    if fragment_mode:
+        try:
+            st.rerun(scope="fragment")
+        except TypeError:
+            # Streamlit < 1.37 has no scoped reruns
+            pass
+    st.rerun()
+
+def send_transaction(function, value=0):
+    """Build, sign and send a contract transaction from the configured account"""
+    params = {'from': account.address}
+    if value:
+        params['value'] = value
+
+    gas_estimate = function.estimate_gas(params)
+    transaction = function.build_transaction({
+        **params,
+        'gas': gas_estimate,
+        'gasPrice': w3.eth.gas_price,
+        'nonce': w3.eth.get_transaction_count(account.address),
+    })
+
+    signed_txn = w3.eth.account.sign_transaction(transaction, account.key)
+    return w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+
+@st.cache_resource
+def get_local_index(kind, chain_id, address):
+    """Shared event-derived index ("rollups" or "history") per chain and contract, restored from disk on first use"""
+    index_class = {"rollups": MarketplaceRollups, "history": JobHistory}[kind]
+    path = os.path.join(DATA_DIR, f"{kind}_{chain_id}_{address.lower()}.json")
+    index = index_class.load(path)
+    index.path = path
+    index.synced_at = 0
+    return index
+
+@st.cache_resource
+def get_event_archive(chain_id, address):
+    """Local raw log archive per chain and contract, shared by every derived view"""
+    return EventArchive(os.path.join(DATA_DIR, f"archive_{chain_id}_{address.lower()}"), address)
+
+def sync_local_indexes():
+    """Advance the local indexes, spending at most SYNC_CHUNKS_PER_RERUN eth_getLogs calls per rerun"""
+    indexes = [get_local_index(kind, chain_id, contract_address) for kind in ("rollups", "history")]
+    # Without FREELANCEX_DEPLOY_BLOCK an empty index would crawl from block 0
+    due = [index for index in indexes
+           if (index.last_block >= 0 or DEPLOY_BLOCK)
+           and (index.behind or time.time() - index.synced_at > INDEX_SYNC_INTERVAL)]
+    if not due:
+        return
+    try:
+        if USE_EVENT_ARCHIVE:
+            # Only the shared archive calls the node; the indexes replay from it
+            archive = get_event_archive(chain_id, contract_address)
+            archive.sync(w3, DEPLOY_BLOCK, max_chunks=SYNC_CHUNKS_PER_RERUN)
+            for index in due:
+                index.sync(w3, contract, from_block=DEPLOY_BLOCK, archive=archive, path=index.path)
+                index.synced_at = time.time()
+        else:
+            # Each index fetches its own logs here, so only the least recently synced one runs
+            index = min(due, key=lambda index: index.synced_at)
+            index.sync(w3, contract, from_block=DEPLOY_BLOCK, path=index.path, max_chunks=SYNC_CHUNKS_PER_RERUN)
+            index.synced_at = time.time()
+    except Exception as e:
+        st.warning(f"⚠️ Trends and history may be stale: {e}")
+
+def show_local_index(kind):
+    """Local index for a panel, noting when it is disabled or still backfilling"""
+    index = get_local_index(kind, chain_id, contract_address)
+    if index.last_block < 0 and not DEPLOY_BLOCK:
+        st.info("ℹ️ Set FREELANCEX_DEPLOY_BLOCK to the contract's deployment block to enable this panel")
+    elif index.behind:
+        st.caption(f"⏳ Indexing block {index.last_block:,} of {index.head_block:,}")
+    return index
+
+@st.cache_resource
+def get_state_store(url):
+    """Shared job state store, opened once per worker"""
+    return open_store(url)
+
+def read_shared_state():
+    """Latest indexer snapshot, or None when no fresh one is available"""
+    if not STATE_STORE_URL:
+        return None
+    try:
+        state = get_state_store(STATE_STORE_URL).read()
+    except Exception:
+        return None
+    # The indexer follows one chain; other networks selected in the sidebar read the RPC directly
+    if not state or not state_matches(state, chain_id, contract_address):
+        return None
+    if time.time() - state["published_at"] > STATE_MAX_AGE:
+        return None
+    return state
+
+@st.cache_data(max_entries=DESCRIPTION_CACHE_SIZE, show_spinner=False)
+def fetch_description(chain_id, address, job_id, _contract):
+    """Full description of a single job (descriptions never change once posted), cached per chain and contract"""
+    return _contract.functions.getJob(job_id).call()[3]
 
-# Sidebar
-with st.sidebar:
-    st.header("🔗 Connection Info")
+def get_receipt(tx_hash):
+    """Transaction receipt, or None while the transaction is not yet mined"""
+    try:
+        return w3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        return None
 
-    # Network connection
-    w3, network_name = get_web3_connection()
-    if not w3:
-        st.stop()
+def show_description(job_id):
+    """Mark a job's full description as requested"""
+    st.session_state[f"show_description_{job_id}"] = True
 
-    # Contract setup
-    contract_address = get_contract_address()
-    contract_abi = load_contract_abi()
+# Opt-in profiling of a single rerun (sidebar button) or of every rerun (FREELANCEX_PROFILE=1)
+profiler = None
+if os.getenv("FREELANCEX_PROFILE") == "1" or st.session_state.pop("profile_next_rerun", False):
+    profiler = RerunProfiler().start()
 
-    try:
-        contract = w3.eth.contract(address=contract_address, abi=contract_abi)
-        st.success(f"✅ Contract loaded")
-        st.write(f"**Address:** {contract_address}")
-    except Exception as e:
-        st.error(f"❌ Contract error: {e}")
-        st.stop()
+# st.rerun() and st.stop() end the script by raising, so the profiler is stopped in finally
+try:
+    # Main App
+    st.title("🧑‍💻 FreelanceX - Decentralized Freelancing Platform")
+
+    # Sidebar
+    with st.sidebar, phase("sidebar"):
+        st.header("🔗 Connection Info")
+
+        # Network connection
+        w3, network_name = get_web3_connection()
+        if not w3:
+            st.stop()
+
+        # Chain id keys shared and local data, so networks never mix; it only changes with the network
+        chain_id_key = f"chain_id_{network_name}"
+        if chain_id_key not in st.session_state:
+            try:
+                st.session_state[chain_id_key] = w3.eth.chain_id
+            except Exception as e:
+                st.error(f"❌ Could not read chain id: {e}")
+                st.stop()
+        chain_id = st.session_state[chain_id_key]
+
+        # Contract setup
+        contract_address = get_contract_address()
+        contract_abi = load_contract_abi()
 
-    # Account info
-    account = get_account_from_private_key()
-    if account:
-        st.write(f"**Wallet:** {account.address}")
         try:
-            balance = w3.eth.get_balance(account.address)
-            st.write(f"**Balance:** {w3.from_wei(balance, 'ether'):.4f} ETH")
-        except:
-            st.write("**Balance:** Unable to fetch")
-    else:
-        st.warning("⚠️ No private key - Read-only mode")
-
-# Main layout
-col1, col2 = st.columns([2, 1])
-
-# LEFT: Jobs
-with col1:
-    # Post Job (only if account available)
-    if account:
+            contract = w3.eth.contract(address=contract_address, abi=contract_abi)
+            st.success(f"✅ Contract loaded")
+            st.write(f"**Address:** {contract_address}")
+        except Exception as e:
+            st.error(f"❌ Contract error: {e}")
+            st.stop()
+
+        # Account info
+        account = get_account_from_private_key()
+        if account:
+            st.write(f"**Wallet:** {account.address}")
+            try:
+                balance = w3.eth.get_balance(account.address)
+                st.write(f"**Balance:** {w3.from_wei(balance, 'ether'):.4f} ETH")
+            except:
+                st.write("**Balance:** Unable to fetch")
+        else:
+            st.warning("⚠️ No private key - Read-only mode")
+
+        # Rendering mode
         st.markdown("---")
-        st.header("📢 Post a Job")
-        with st.form("post_job"):
-            desc = st.text_area("📝 Job Description", placeholder="Describe your job...")
-            eth = st.number_input("💰 Budget (ETH)", min_value=0.001, value=0.1, step=0.001, format="%.3f")
-            if st.form_submit_button("📤 Post Job"):
-                if not desc.strip():
-                    st.error("❌ Description cannot be empty.")
-                else:
+        fragment_mode = st.checkbox(
+            "⚡ Fragment rendering",
+            value=_st_fragment is not None,
+            disabled=_st_fragment is None,
+            help="Re-render only the job card, job list or stats panel that changed instead of the whole app"
+        )
+
+        if st.button("🔬 Profile next rerun"):
+            st.session_state["profile_next_rerun"] = True
+            st.rerun()
+
+    @as_fragment
+    def render_job_card(summary):
+        """Render a single job card with its actions"""
+        job_id = summary[0]
+
+        # A sent action stays pending until mined; only then is the job re-read
+        notice = None
+        pending = st.session_state.get(f"pending_tx_{job_id}")
+        if pending:
+            tx_hash, message = pending
+            try:
+                receipt = get_receipt(tx_hash)
+            except Exception as e:
+                receipt = None
+                st.warning(f"⚠️ Could not check TX {tx_hash}: {e}")
+            if receipt is not None:
+                del st.session_state[f"pending_tx_{job_id}"]
+                pending = None
+                if receipt["status"] == 1:
+                    notice = (st.success, f"✅ {message}! TX: {tx_hash}")
                     try:
-                        # Build transaction
-                        nonce = w3.eth.get_transaction_count(account.address)
-                        gas_price = w3.eth.gas_price
-                        value = w3.to_wei(eth, 'ether')
-
-                        # Estimate gas
-                        gas_estimate = contract.functions.postJob(desc).estimate_gas({
-                            'from': account.address,
-                            'value': value
-                        })
-
-                        # Build transaction
-                        transaction = contract.functions.postJob(desc).build_transaction({
-                            'from': account.address,
-                            'value': value,
-                            'gas': gas_estimate,
-                            'gasPrice': gas_price,
-                            'nonce': nonce,
-                        })
-
-                        # Sign and send
-                        signed_txn = w3.eth.account.sign_transaction(transaction, account.key)
-                        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-
-                        st.success(f"✅ Job posted! TX: {tx_hash.hex()}")
-                        st.rerun()
-
+                        st.session_state[f"job_override_{job_id}"] = (
+                            receipt["blockNumber"], fetch_job_summaries(contract, chain_id, job_id, 1)[0])
                     except Exception as e:
-                        st.error(f"Error: {e}")
+                        st.warning(f"⚠️ Could not refresh job #{job_id}: {e}")
+                else:
+                    notice = (st.error, f"❌ TX {tx_hash} reverted")
+
+        # A card action refreshes its own job without reloading the whole list
+        override = st.session_state.get(f"job_override_{job_id}")
+        if override:
+            summary = override[1]
+        job_id, client, freelancer, budget, status, preview, description_length, _ = summary
+        truncated = description_length > len(preview.encode("utf-8"))
+
+        label = f"#{job_id} - {preview}..." if truncated else f"#{job_id} - {preview}"
+        with st.expander(label, expanded=bool(pending or notice)):
+            if notice:
+                show, text = notice
+                show(text)
+
+            # Full descriptions are only downloaded once asked for
+            if not truncated:
+                st.write(f"**Description:** {preview}")
+            elif st.session_state.get(f"show_description_{job_id}"):
+                try:
+                    st.write(f"**Description:** {fetch_description(chain_id, contract_address, job_id, contract)}")
+                except Exception as e:
+                    st.error(f"Error loading description: {e}")
+            else:
+                st.write(f"**Description:** {preview}...")
+                st.button("📄 Show full description", key=f"show_description_btn_{job_id}",
+                          on_click=show_description, args=(job_id,))
+            st.write(f"**Client:** {client}")
+            st.write(f"**Budget:** {w3.from_wei(budget, 'ether')} ETH")
+            st.write(f"**Status:** {STATUS_MAP.get(status, 'Unknown')}")
+
+            if freelancer != ZERO_ADDRESS:
+                st.write(f"**Freelancer:** {freelancer}")
+
+            # Action buttons (only if account available)
+            if not account:
+                return
+
+            if pending:
+                # No action buttons until the pending TX is mined, so it cannot be sent twice
+                st.info(f"⏳ {pending[1]}: waiting for TX {pending[0]} to be mined")
+                st.button("🔄 Check status", key=f"check_tx_{job_id}")
+                return
+
+            action = None
+            if status == 0 and client.lower() != account.address.lower():
+                if st.button(f"✅ Take Job #{job_id}", key=f"take_{job_id}"):
+                    action = (contract.functions.takeJob(job_id), "Job taken")
+            elif status == 1 and client.lower() == account.address.lower():
+                if st.button(f"🎉 Complete Job #{job_id}", key=f"complete_{job_id}"):
+                    action = (contract.functions.completeJob(job_id), "Job completed")
+
+            if action:
+                function, message = action
+                try:
+                    tx_hash = send_transaction(function)
+                    st.session_state[f"pending_tx_{job_id}"] = (tx_hash.hex(), message)
+                    rerun_fragment()
+                except Exception as e:
+                    st.error(f"Error: {e}")
+
+    def change_job_page(delta):
+        """Move the job list window by delta pages"""
+        st.session_state["job_page"] = st.session_state.get("job_page", 0) + delta
+
+    @as_fragment
+    def render_job_list():
+        """Render the visible window of the job list"""
+        # Prefer the indexer's shared snapshot over hitting the RPC from every worker
+        state = read_shared_state()
+        try:
+            job_count = len(state["jobs"]) if state else contract.functions.getJobCount().call()
+        except Exception as e:
+            st.error(f"Error fetching jobs: {e}")
+            return
 
-    st.markdown("---")
-    st.header("📋 All Jobs")
+        if job_count == 0:
+            st.info("No jobs yet. Be the first to post!")
+            return
 
-    try:
-        # Use the getAllJobs function for better performance
-        all_jobs = contract.functions.getAllJobs().call()
+        # Only the current page of cards is fetched and built, so payload and widget count stay constant as jobs grow
+        page_count = (job_count + JOBS_PER_PAGE - 1) // JOBS_PER_PAGE
+        page = max(0, min(st.session_state.get("job_page", 0), page_count - 1))
+        st.session_state["job_page"] = page
+        start = page * JOBS_PER_PAGE
 
-        if len(all_jobs) == 0:
-            st.info("No jobs yet. Be the first to post!")
-        else:
-            for job in all_jobs:
-                job_id, client, freelancer, description, budget, status = job
-
-                with st.expander(f"#{job_id} - {description[:50]}..." if len(description) > 50 else f"#{job_id} - {description}"):
-                    st.write(f"**Description:** {description}")
-                    st.write(f"**Client:** {client}")
-                    st.write(f"**Budget:** {w3.from_wei(budget, 'ether')} ETH")
-
-                    status_map = {0: "🟢 Open", 1: "🟡 In Progress", 2: "✅ Completed"}
-                    st.write(f"**Status:** {status_map.get(status, 'Unknown')}")
-
-                    if freelancer != "0x0000000000000000000000000000000000000000":
-                        st.write(f"**Freelancer:** {freelancer}")
-
-                    # Action buttons (only if account available)
-                    if account:
-                        if status == 0 and client.lower() != account.address.lower():
-                            if st.button(f"✅ Take Job #{job_id}", key=f"take_{job_id}"):
-                                try:
-                                    # Build takeJob transaction
-                                    nonce = w3.eth.get_transaction_count(account.address)
-                                    gas_estimate = contract.functions.takeJob(job_id).estimate_gas({'from': account.address})
-
-                                    transaction = contract.functions.takeJob(job_id).build_transaction({
-                                        'from': account.address,
-                                        'gas': gas_estimate,
-                                        'gasPrice': w3.eth.gas_price,
-                                        'nonce': nonce,
-                                    })
-
-                                    signed_txn = w3.eth.account.sign_transaction(transaction, account.key)
-                                    tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-
-                                    st.success(f"✅ Job taken! TX: {tx_hash.hex()}")
-                                    st.rerun()
-                                except Exception as e:
-                                    st.error(f"Error: {e}")
-
-                        elif status == 1 and client.lower() == account.address.lower():
-                            if st.button(f"🎉 Complete Job #{job_id}", key=f"complete_{job_id}"):
-                                try:
-                                    # Build completeJob transaction
-                                    nonce = w3.eth.get_transaction_count(account.address)
-                                    gas_estimate = contract.functions.completeJob(job_id).estimate_gas({'from': account.address})
-
-                                    transaction = contract.functions.completeJob(job_id).build_transaction({
-                                        'from': account.address,
-                                        'gas': gas_estimate,
-                                        'gasPrice': w3.eth.gas_price,
-                                        'nonce': nonce,
-                                    })
-
-                                    signed_txn = w3.eth.account.sign_transaction(transaction, account.key)
-                                    tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-
-                                    st.success(f"✅ Job completed! TX: {tx_hash.hex()}")
-                                    st.rerun()
-                                except Exception as e:
-                                    st.error(f"Error: {e}")
+        try:
+            if state:
+                summaries = summaries_from_state({"jobs": state["jobs"][start:start + JOBS_PER_PAGE]})
+            else:
+                summaries = fetch_job_summaries(contract, chain_id, start, JOBS_PER_PAGE)
+        except Exception as e:
+            st.error(f"Error fetching jobs: {e}")
+            return
+
+        # List data supersedes a per-card refresh once it includes the refreshing TX's block;
+        # an indexer snapshot can be up to STATE_MAX_AGE old, a direct RPC read is always newer
+        for key in [k for k in st.session_state if k.startswith("job_override_")]:
+            if not state or st.session_state[key][0] <= state["block"]:
+                del st.session_state[key]
+
+        for summary in summaries:
+            render_job_card(summary)
+
+        if page_count > 1:
+            prev_col, info_col, next_col = st.columns([1, 2, 1])
+            prev_col.button("◀ Prev", key="job_page_prev", disabled=page == 0,
+                            on_click=change_job_page, args=(-1,))
+            info_col.write(f"Page {page + 1} of {page_count} · Jobs {start + 1}-{min(start + JOBS_PER_PAGE, job_count)} of {job_count}")
+            next_col.button("Next ▶", key="job_page_next", disabled=page == page_count - 1,
+                            on_click=change_job_page, args=(1,))
+
+    @as_fragment
+    def render_stats():
+        """Render job counts by status"""
+        try:
+            state = read_shared_state()
+            stats = state["stats"] if state else count_statuses(fetch_job_summaries(contract, chain_id))
+
+            st.metric("Total Jobs", stats["total"])
+            st.metric("🟢 Open", stats["open"])
+            st.metric("🟡 In Progress", stats["in_progress"])
+            st.metric("✅ Completed", stats["completed"])
+            if state:
+                st.caption(f"📦 Shared state as of block {state['block']}")
+        except Exception as e:
+            st.error(f"Stats error: {e}")
+
+        if fragment_mode:
+            # Clicking a button inside a fragment already reruns just that fragment
+            st.button("🔄 Refresh Stats")
+
+    @as_fragment
+    def render_trends():
+        """Render marketplace trend charts from the precomputed rollups"""
+        rollups = show_local_index("rollups")
+
+        resolution = st.radio("Bucket size", ["hourly", "daily"], horizontal=True, key="trend_resolution")
+        limit = 48 if resolution == "hourly" else 30
+
+        posted = rollups.series("jobs_posted", resolution, "count", limit)
+        if not posted:
+            st.info("No marketplace events yet.")
+            return
+
+        index = [datetime.fromtimestamp(start, tz=timezone.utc) for start, _ in posted]
+        escrowed = rollups.series("jobs_posted", resolution, "sum", limit)
+        released = rollups.series("jobs_completed", resolution, "sum", limit)
+        time_to_take = rollups.series("jobs_taken", resolution, "p50", limit)
+
+        st.write("**Jobs posted**")
+        st.bar_chart(pd.DataFrame({"Jobs posted": [v for _, v in posted]}, index=index))
+
+        st.write("**ETH escrowed vs released**")
+        st.line_chart(pd.DataFrame({
+            "Escrowed": [float(w3.from_wei(v, 'ether')) for _, v in escrowed],
+            "Released": [float(w3.from_wei(v, 'ether')) for _, v in released],
+        }, index=index))
+
+        st.write("**Median time-to-take (hours)**")
+        st.line_chart(pd.DataFrame({
+            "Median": [None if v is None else v / 3600 for _, v in time_to_take],
+        }, index=index))
+
+    @as_fragment
+    def render_history():
+        """Render job state and stats as of a past block"""
+        history = show_local_index("history")
+        if history.last_block < 0:
+            st.info("No history indexed yet.")
+            return
+
+        block_number = st.number_input("Block", min_value=0, max_value=history.last_block,
+                                       value=history.last_block, step=1, key="history_block")
+        job_id = st.number_input("Job ID (optional)", min_value=-1, value=-1, step=1, key="history_job",
+                                 help="-1 shows stats for all jobs")
+
+        if job_id < 0:
+            stats = history.stats_at(block_number)
+            st.write(f"**Total:** {stats['total']} · 🟢 {stats['open']} · 🟡 {stats['in_progress']} · ✅ {stats['completed']}")
+            return
+
+        job = history.job_at(job_id, block_number)
+        if job is None:
+            st.info(f"Job #{job_id} did not exist at block {block_number}")
+            return
+
+        client, freelancer, budget, status = job
+        st.write(f"**Client:** {client}")
+        st.write(f"**Budget:** {w3.from_wei(budget, 'ether')} ETH")
+        st.write(f"**Status:** {STATUS_MAP.get(status, 'Unknown')}")
+        if freelancer != ZERO_ADDRESS:
+            st.write(f"**Freelancer:** {freelancer}")
+
+    def render_profile(summary):
+        """Render the last rerun profile in the sidebar"""
+        with st.sidebar.expander("🔬 Last rerun profile", expanded=True):
+            st.write(f"**Wall:** {summary['wall'] * 1000:.0f} ms · **CPU:** {summary['cpu'] * 1000:.0f} ms · "
+                     f"**RPC wait:** {summary['rpc_wait'] * 1000:.0f} ms")
+
+            st.write("**Phases**")
+            st.dataframe(pd.DataFrame(
+                [(name, wall * 1000, cpu * 1000) for name, wall, cpu in summary["phases"]],
+                columns=["Phase", "Wall (ms)", "CPU (ms)"]
+            ), hide_index=True)
+
+            st.write("**Self time by package**")
+            st.dataframe(pd.DataFrame(
+                [(package, seconds * 1000) for package, seconds in summary["packages"]],
+                columns=["Package", "Self (ms)"]
+            ), hide_index=True)
+
+            st.write("**Top functions (cumulative)**")
+            st.dataframe(pd.DataFrame(
+                [(name, calls, tottime * 1000, cumtime * 1000) for name, calls, tottime, cumtime in summary["top"]],
+                columns=["Function", "Calls", "Self (ms)", "Cumulative (ms)"]
+            ), hide_index=True)
+
+            for kind, path in summary["files"].items():
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        st.download_button(f"⬇️ {os.path.basename(path)}", f.read(),
+                                           file_name=os.path.basename(path), key=f"profile_{kind}")
+
+    # Trends and History read local indexes; advance them once per rerun
+    with phase("index sync"):
+        sync_local_indexes()
+
+    # Main layout
+    col1, col2 = st.columns([2, 1])
+
+    # LEFT: Jobs
+    with col1:
+        # Post Job (only if account available)
+        if account:
+            st.markdown("---")
+            st.header("📢 Post a Job")
+            with st.form("post_job"):
+                desc = st.text_area("📝 Job Description", placeholder="Describe your job...")
+                eth = st.number_input("💰 Budget (ETH)", min_value=0.001, value=0.1, step=0.001, format="%.3f")
+                if st.form_submit_button("📤 Post Job"):
+                    if not desc.strip():
+                        st.error("❌ Description cannot be empty.")
+                    else:
+                        try:
+                            tx_hash = send_transaction(contract.functions.postJob(desc), value=w3.to_wei(eth, 'ether'))
+                            st.success(f"✅ Job posted! TX: {tx_hash.hex()}")
+                            st.rerun()
+
+                        except Exception as e:
+                            st.error(f"Error: {e}")
 
-    except Exception as e:
-        st.error(f"Error fetching jobs: {e}")
+        st.markdown("---")
+        st.header("📋 All Jobs")
+        with phase("job list"):
+            render_job_list()
 
-# RIGHT: Stats
-with col2:
-    st.header("📊 Stats")
-    try:
-        all_jobs = contract.functions.getAllJobs().call()
-        total = len(all_jobs)
-        open_, inprog, done = 0, 0, 0
-
-        for job in all_jobs:
-            status = job[5]  # status is the 6th element
-            if status == 0: open_ += 1
-            elif status == 1: inprog += 1
-            elif status == 2: done += 1
-
-        st.metric("Total Jobs", total)
-        st.metric("🟢 Open", open_)
-        st.metric("🟡 In Progress", inprog)
-        st.metric("✅ Completed", done)
-    except Exception as e:
-        st.error(f"Stats error: {e}")
+    # RIGHT: Stats
+    with col2:
+        st.header("📊 Stats")
+        with phase("stats"):
+            render_stats()
+
+        st.markdown("---")
+        st.header("📈 Trends")
+        with phase("trends"):
+            render_trends()
+
+        st.markdown("---")
+        st.header("🕰️ History")
+        with phase("history"):
+            render_history()
+
+        st.markdown("---")
+        st.header("⚙️ Utilities")
+        if st.button("🔄 Refresh"):
+            st.rerun()
 
     st.markdown("---")
-    st.header("⚙️ Utilities")
-    if st.button("🔄 Refresh"):
-        st.rerun()
+    st.markdown("🚀 **FreelanceX** — Connecting clients & freelancers on the blockchain.")
+finally:
+    if profiler:
+        st.session_state["last_profile"] = profiler.stop(os.path.join(DATA_DIR, "profiles"))
 
-st.markdown("---")
-st.markdown("🚀 **FreelanceX** — Connecting clients & freelancers on the blockchain.")
+if "last_profile" in st.session_state:
+    render_profile(st.session_state["last_profile"])